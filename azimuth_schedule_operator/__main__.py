@@ -1,8 +1,25 @@
 import asyncio
+import logging
 
 import kopf
 
+from . import debug
 from . import metrics
+from .utils import k8s
+from .utils import scope
+
+LOG = logging.getLogger(__name__)
+
+
+async def restart_on_namespaces_change(client, namespaces):
+    """
+    Returns when the namespaces to watch change.
+
+    kopf stops the operator when this returns, and the pod is restarted to
+    watch the new namespaces.
+    """
+    namespaces = await scope.wait_for_namespaces_change(client, namespaces)
+    LOG.info("Namespaces to watch changed to: %s - restarting", ", ".join(namespaces))
 
 
 async def main():
@@ -13,11 +30,30 @@ async def main():
     from . import operator  # noqa
 
     kopf.configure()
-    tasks = await kopf.spawn_tasks(
-        clusterwide=True, liveness_endpoint="http://0.0.0.0:8000/healthz"
-    )
-    tasks.append(asyncio.create_task(metrics.metrics_server()))
-    await kopf.run_tasks(tasks)
+
+    async with k8s.get_k8s_client() as client:
+        namespaces = await scope.get_watch_namespaces(client)
+        if namespaces == []:
+            LOG.warning("No namespaces match the watch scope - waiting for one.")
+            namespaces = await scope.wait_for_namespaces_change(client, namespaces)
+        if namespaces is None:
+            watch_scope = dict(clusterwide=True)
+        else:
+            LOG.info("Watching schedules in namespaces: %s", ", ".join(namespaces))
+            watch_scope = dict(namespaces=namespaces)
+        scope.apply_label_selector()
+
+        tasks = await kopf.spawn_tasks(
+            liveness_endpoint="http://0.0.0.0:8000/healthz", **watch_scope
+        )
+        tasks.append(asyncio.create_task(metrics.metrics_server(namespaces)))
+        if debug.DEBUG_ENABLED:
+            tasks.append(asyncio.create_task(debug.debug_server()))
+        if scope.WATCH_NAMESPACE_SELECTOR:
+            tasks.append(
+                asyncio.create_task(restart_on_namespaces_change(client, namespaces))
+            )
+        await kopf.run_tasks(tasks)
 
 
 asyncio.run(main())
@@ -0,0 +1,214 @@
+import asyncio
+import collections
+import io
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from aiohttp import web
+
+LOG = logging.getLogger(__name__)
+
+DEBUG_ENABLED = os.environ.get("AZIMUTH_SCHEDULE_DEBUG_ENABLED", "").lower() in {
+    "1",
+    "true",
+    "yes",
+}
+DEBUG_ADDRESS = os.environ.get("AZIMUTH_SCHEDULE_DEBUG_ADDRESS", "127.0.0.1")
+DEBUG_PORT = int(os.environ.get("AZIMUTH_SCHEDULE_DEBUG_PORT", "8081"))
+
+# The maximum number of seconds that a single capture can run for
+MAX_SECONDS = 300
+
+# Only one timed capture runs at once, so captures do not skew each other
+CAPTURE_LOCK = web.AppKey("capture_lock", asyncio.Lock)
+
+
+def get_float_param(request, name, default, minimum=0.0, maximum=MAX_SECONDS):
+    """Returns the named query parameter as a float within the given bounds."""
+    try:
+        value = float(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name} must be a number\n")
+    if not minimum <= value <= maximum:
+        raise web.HTTPBadRequest(
+            text=f"{name} must be between {minimum} and {maximum}\n"
+        )
+    return value
+
+
+def get_int_param(request, name, default, maximum=1000):
+    """Returns the named query parameter as a positive integer."""
+    return int(get_float_param(request, name, default, 1, maximum))
+
+
+def text_response(lines):
+    return web.Response(text="".join(f"{line}\n" for line in lines))
+
+
+def sample_stacks(thread_id, seconds, interval):
+    """
+    Samples the stack of the given thread until the time is up.
+
+    Returns a counter of the stacks, in folded format, and the number of samples.
+    """
+    stacks = collections.Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        if frames:
+            stacks[";".join(reversed(frames))] += 1
+            samples += 1
+        time.sleep(interval)
+    return stacks, samples
+
+
+async def profile_handler(request):
+    """
+    Samples the event loop thread and returns the stacks in folded format.
+
+    The output can be passed directly to flamegraph tools.
+    """
+    seconds = get_float_param(request, "seconds", 10)
+    interval = get_float_param(request, "interval", 0.01, 0.001, 1)
+    # Handlers run on the event loop thread, which is the one we want to sample
+    thread_id = threading.get_ident()
+    async with request.app[CAPTURE_LOCK]:
+        stacks, samples = await asyncio.to_thread(
+            sample_stacks, thread_id, seconds, interval
+        )
+    lines = [f"# {samples} samples over {seconds}s"]
+    lines.extend(f"{stack} {count}" for stack, count in stacks.most_common())
+    return text_response(lines)
+
+
+def take_snapshot():
+    """Takes a tracemalloc snapshot without the allocations made by tracemalloc."""
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+
+
+async def tracemalloc_handler(request):
+    """
+    Returns the allocation sites that grew the most over the given time.
+    """
+    seconds = get_float_param(request, "seconds", 10)
+    limit = get_int_param(request, "limit", 25)
+    frames = get_int_param(request, "frames", 1, 100)
+    async with request.app[CAPTURE_LOCK]:
+        # Only trace allocations while a capture is running, as it is expensive
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(frames)
+        try:
+            before = take_snapshot()
+            await asyncio.sleep(seconds)
+            after = take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+    key_type = "traceback" if frames > 1 else "lineno"
+    stats = after.compare_to(before, key_type)
+    lines = [f"# top {limit} allocation sites by growth over {seconds}s"]
+    for stat in stats[:limit]:
+        lines.append(str(stat))
+        if frames > 1:
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+    return text_response(lines)
+
+
+async def tasks_handler(request):
+    """
+    Returns all the asyncio tasks with their current stacks.
+    """
+    tasks = sorted(asyncio.all_tasks(), key=lambda task: task.get_name())
+    output = io.StringIO()
+    output.write(f"# {len(tasks)} tasks\n")
+    for task in tasks:
+        output.write(f"\n{task!r}\n")
+        task.print_stack(file=output)
+    return web.Response(text=output.getvalue())
+
+
+class SlowCallbackHandler(logging.Handler):
+    """
+    Logging handler that collects the slow callback reports from asyncio.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reports = []
+
+    def emit(self, record):
+        # asyncio reports slow callbacks as "Executing <handle> took <n> seconds"
+        if isinstance(record.msg, str) and record.msg.startswith("Executing "):
+            self.reports.append(record.getMessage())
+
+
+async def slow_callbacks_handler(request):
+    """
+    Returns the event loop callbacks that were slower than the threshold.
+
+    asyncio debug mode is only enabled for the duration of the capture.
+    """
+    seconds = get_float_param(request, "seconds", 10)
+    threshold = get_float_param(request, "threshold", 0.1, 0.001, 60)
+    loop = asyncio.get_running_loop()
+    asyncio_logger = logging.getLogger("asyncio")
+    handler = SlowCallbackHandler()
+    async with request.app[CAPTURE_LOCK]:
+        debug = loop.get_debug()
+        slow_callback_duration = loop.slow_callback_duration
+        asyncio_logger.addHandler(handler)
+        loop.slow_callback_duration = threshold
+        loop.set_debug(True)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            loop.set_debug(debug)
+            loop.slow_callback_duration = slow_callback_duration
+            asyncio_logger.removeHandler(handler)
+    lines = [f"# {len(handler.reports)} callbacks slower than {threshold}s"]
+    lines.extend(handler.reports)
+    return text_response(lines)
+
+
+async def debug_server():
+    """
+    Launch a lightweight HTTP server to serve the diagnostics endpoints.
+
+    Nothing is traced or sampled until one of the endpoints is requested.
+    """
+    app = web.Application()
+    app[CAPTURE_LOCK] = asyncio.Lock()
+    app.add_routes(
+        [
+            web.get("/debug/profile", profile_handler),
+            web.get("/debug/tracemalloc", tracemalloc_handler),
+            web.get("/debug/tasks", tasks_handler),
+            web.get("/debug/slow-callbacks", slow_callbacks_handler),
+        ]
+    )
+
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+
+    site = web.TCPSite(runner, DEBUG_ADDRESS, DEBUG_PORT, shutdown_timeout=1.0)
+    await site.start()
+    LOG.info("Serving diagnostics on %s:%s", DEBUG_ADDRESS, DEBUG_PORT)
+
+    # Sleep until we need to clean up
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await asyncio.shield(runner.cleanup())
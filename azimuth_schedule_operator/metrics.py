@@ -6,6 +6,7 @@ from aiohttp import web
 import easykube
 
 from .models import registry
+from .utils import scope
 
 
 class Metric:
@@ -41,6 +42,38 @@ class Metric:
         for obj in self._objs:
             yield self.labels(obj), self.value(obj)
 
+    def samples(self):
+        """Returns the samples for the metric, i.e. (name, labels, value) tuples."""
+        for labels, value in self.records():
+            yield self.name, labels, value
+
+
+class Histogram(Metric):
+    type = "histogram"
+    # The upper bounds of the buckets, not including +Inf
+    buckets = ()
+
+    def __init__(self):
+        super().__init__()
+        self._bucket_counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0
+
+    def observe(self, value):
+        """Record an observation in the histogram."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self._bucket_counts[i] += 1
+        self._count += 1
+        self._sum += value
+
+    def samples(self):
+        for bound, count in zip(self.buckets, self._bucket_counts):
+            yield f"{self.name}_bucket", {"le": format_value(float(bound))}, count
+        yield f"{self.name}_bucket", {"le": "+Inf"}, self._count
+        yield f"{self.name}_count", {}, self._count
+        yield f"{self.name}_sum", {}, self._sum
+
 
 class ScheduleMetric(Metric):
     prefix = "azimuth_schedule"
@@ -72,6 +105,22 @@ class ScheduleDeleteTriggered(ScheduleMetric):
         return 1 if obj.get("status", {}).get("refDeleteTriggered", False) else 0
 
 
+class ScheduleDeleteStuck(ScheduleMetric):
+    suffix = "delete_stuck"
+    type = "gauge"
+    description = "Indicates whether the delete has not completed within the timeout"
+
+    def value(self, obj):
+        return 1 if obj.get("status", {}).get("refDeleteStuck", False) else 0
+
+
+class ScheduleDeleteDuration(Histogram):
+    prefix = "azimuth_schedule"
+    suffix = "delete_duration_seconds"
+    description = "Time taken for refs to be deleted after the delete is triggered"
+    buckets = (30, 60, 120, 300, 600, 900, 1800, 3600, 7200)
+
+
 def escape(content):
     """Escape the given content for use in metric output."""
     return content.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
@@ -98,14 +147,14 @@ def render_openmetrics(*metrics):
             output.append(f"# HELP {metric.name} {escape(metric.description)}\n")
         output.append(f"# TYPE {metric.name} {metric.type}\n")
 
-        for labels, value in metric.records():
+        for name, labels, value in metric.samples():
             if labels:
                 labelstr = "{{{0}}}".format(
                     ",".join([f'{k}="{escape(v)}"' for k, v in sorted(labels.items())])
                 )
             else:
                 labelstr = ""
-            output.append(f"{metric.name}{labelstr} {format_value(value)}\n")
+            output.append(f"{name}{labelstr} {format_value(value)}\n")
     output.append("# EOF\n")
 
     return (
@@ -119,12 +168,28 @@ METRICS = {
         "schedules": [
             ScheduleRefFound,
             ScheduleDeleteTriggered,
+            ScheduleDeleteStuck,
         ],
     },
 }
 
+# Observed by the operator as deletes complete, so it is not built per request
+DELETE_DURATION = ScheduleDeleteDuration()
 
-async def metrics_handler(ekclient, request):
+
+def list_params(namespaces):
+    """Returns the list parameters that match the operator's watch scope."""
+    params = {}
+    if scope.WATCH_LABEL_SELECTOR:
+        params["labelSelector"] = scope.WATCH_LABEL_SELECTOR
+    if namespaces is None:
+        yield dict(params, all_namespaces=True)
+    else:
+        for namespace in namespaces:
+            yield dict(params, namespace=namespace)
+
+
+async def metrics_handler(ekclient, namespaces, request):
     """Produce metrics for the operator."""
     metrics = []
     for api_group, resources in METRICS.items():
@@ -132,21 +197,30 @@ async def metrics_handler(ekclient, request):
         for resource, metric_classes in resources.items():
             ekresource = await ekapi.resource(resource)
             resource_metrics = [klass() for klass in metric_classes]
-            async for obj in ekresource.list(all_namespaces=True):
-                for metric in resource_metrics:
-                    metric.add_obj(obj)
+            for params in list_params(namespaces):
+                async for obj in ekresource.list(**params):
+                    for metric in resource_metrics:
+                        metric.add_obj(obj)
             metrics.extend(resource_metrics)
+    metrics.append(DELETE_DURATION)
 
     content_type, content = render_openmetrics(*metrics)
     return web.Response(headers={"Content-Type": content_type}, body=content)
 
 
-async def metrics_server():
-    """Launch a lightweight HTTP server to serve the metrics endpoint."""
+async def metrics_server(namespaces=None):
+    """
+    Launch a lightweight HTTP server to serve the metrics endpoint.
+
+    Metrics are only produced for schedules in the given namespaces, or in all
+    namespaces if none are given.
+    """
     ekclient = easykube.Configuration.from_environment().async_client()
 
     app = web.Application()
-    app.add_routes([web.get("/metrics", functools.partial(metrics_handler, ekclient))])
+    app.add_routes(
+        [web.get("/metrics", functools.partial(metrics_handler, ekclient, namespaces))]
+    )
 
     runner = web.AppRunner(app, handle_signals=False)
     await runner.setup()
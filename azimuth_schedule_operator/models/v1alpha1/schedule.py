@@ -10,6 +10,14 @@ class ScheduleStatus(schema.BaseModel):
     ref_exists: bool = False
     # updated when delete has been triggered
     ref_delete_triggered: bool = False
+    # when the delete was triggered
+    ref_delete_triggered_at: schema.Optional[datetime.datetime] = None
+    # updated when the watch shows the ref has gone
+    ref_deleted_at: schema.Optional[datetime.datetime] = None
+    # time between the delete being triggered and the ref going
+    ref_delete_duration_seconds: schema.Optional[float] = None
+    # updated when the ref is not gone within the delete timeout
+    ref_delete_stuck: bool = False
     updated_at: schema.Optional[datetime.datetime] = None
 
 
@@ -6,9 +6,11 @@ import sys
 
 import kopf
 
+from azimuth_schedule_operator import metrics
 from azimuth_schedule_operator.models import registry
 from azimuth_schedule_operator.models.v1alpha1 import schedule as schedule_crd
 from azimuth_schedule_operator.utils import k8s
+from azimuth_schedule_operator.utils import scope
 
 LOG = logging.getLogger(__name__)
 K8S_CLIENT = None
@@ -16,6 +18,19 @@ K8S_CLIENT = None
 CHECK_INTERVAL_SECONDS = int(
     os.environ.get("AZIMUTH_SCHEDULE_CHECK_INTERVAL_SECONDS", "60")
 )
+# A triggered delete is flagged as stuck if the ref is not gone after this time
+DELETE_TIMEOUT_SECONDS = int(
+    os.environ.get("AZIMUTH_SCHEDULE_DELETE_TIMEOUT_SECONDS", "3600")
+)
+
+# The deletes that are in flight, grouped by the watch that tracks them
+# Keys are (api_version, kind, namespace) with a namespace of None for all namespaces,
+# values map the (namespace, name) of each ref to the schedule that deleted it
+DELETES_IN_FLIGHT = {}
+# The tasks running the watches, with the same keys as DELETES_IN_FLIGHT
+DELETE_WATCHES = {}
+# The (namespace, name) of the refs that currently exist, as seen by each watch
+EXISTING_REFS = {}
 
 
 @kopf.on.startup()
@@ -43,8 +58,14 @@ async def startup(settings, **kwargs):
         )
         api_version = f"{api_group}/{preferred_version}"
         plural_name = crd["spec"]["names"]["plural"]
+        # The operator may only have access to the namespaces it watches
+        if scope.WATCH_NAMESPACES:
+            namespace = scope.WATCH_NAMESPACES[0]
+            path = f"/apis/{api_version}/namespaces/{namespace}/{plural_name}"
+        else:
+            path = f"/apis/{api_version}/{plural_name}"
         try:
-            _ = await K8S_CLIENT.get(f"/apis/{api_version}/{plural_name}")
+            _ = await K8S_CLIENT.get(path)
         except Exception:
             LOG.exception("api for %s not available - exiting", crd["metadata"]["name"])
             sys.exit(1)
@@ -52,6 +73,8 @@ async def startup(settings, **kwargs):
 
 @kopf.on.cleanup()
 async def cleanup(**_):
+    for task in DELETE_WATCHES.values():
+        task.cancel()
     if K8S_CLIENT:
         await K8S_CLIENT.aclose()
     LOG.info("Cleanup complete.")
@@ -68,6 +91,14 @@ async def delete_reference(namespace: str, ref: schedule_crd.ScheduleRef):
     await resource.delete(ref.name, namespace=namespace)
 
 
+async def watch_references(api_version: str, kind: str, namespace: str = None):
+    resource = await K8S_CLIENT.api(api_version).resource(kind)
+    if namespace is None:
+        return await resource.watch_list(all_namespaces=True)
+    else:
+        return await resource.watch_list(namespace=namespace)
+
+
 async def update_schedule_status(namespace: str, name: str, status_updates: dict):
     status_resource = await K8S_CLIENT.api(registry.API_VERSION).resource(
         "schedules/status"
@@ -85,26 +116,76 @@ async def check_for_delete(namespace: str, schedule: schedule_crd.Schedule):
         LOG.info(f"Attempting delete for {namespace} and {schedule.metadata.name}.")
         await delete_reference(namespace, schedule.spec.ref)
         await update_schedule(
-            namespace, schedule.metadata.name, ref_delete_triggered=True
+            namespace,
+            schedule.metadata.name,
+            ref_delete_triggered=True,
+            ref_delete_triggered_at=now,
         )
+        schedule.status.ref_delete_triggered = True
+        schedule.status.ref_delete_triggered_at = now
+        await track_delete(namespace, schedule)
     else:
         LOG.info(f"No delete for {namespace} and {schedule.metadata.name}.")
 
 
+async def check_for_stuck_delete(namespace: str, schedule: schedule_crd.Schedule):
+    # Only uses the schedule status, so the ref is never fetched here
+    triggered_at = schedule.status.ref_delete_triggered_at
+    if not triggered_at:
+        return
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if (now - triggered_at).total_seconds() >= DELETE_TIMEOUT_SECONDS:
+        LOG.warning(f"Delete is stuck for {namespace} and {schedule.metadata.name}.")
+        await update_schedule(namespace, schedule.metadata.name, ref_delete_stuck=True)
+
+
+async def record_delete_complete(namespace: str, schedule: schedule_crd.Schedule):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    duration = None
+    # Schedules that triggered a delete before this was recorded have no start time
+    triggered_at = schedule.status.ref_delete_triggered_at
+    if triggered_at:
+        duration = (now - triggered_at).total_seconds()
+        metrics.DELETE_DURATION.observe(duration)
+    LOG.info(f"Delete complete for {namespace} and {schedule.metadata.name}.")
+    await update_schedule(
+        namespace,
+        schedule.metadata.name,
+        ref_deleted_at=now,
+        ref_delete_duration_seconds=duration,
+        ref_delete_stuck=False,
+    )
+
+
+def format_time(value: datetime.datetime):
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 async def update_schedule(
     namespace: str,
     name: str,
     ref_exists: bool = None,
     ref_delete_triggered: bool = None,
+    ref_delete_triggered_at: datetime.datetime = None,
+    ref_deleted_at: datetime.datetime = None,
+    ref_delete_duration_seconds: float = None,
+    ref_delete_stuck: bool = None,
 ):
     now = datetime.datetime.now(datetime.timezone.utc)
-    now_string = now.strftime("%Y-%m-%dT%H:%M:%SZ")
-    status_updates = dict(updatedAt=now_string)
+    status_updates = dict(updatedAt=format_time(now))
 
     if ref_exists is not None:
         status_updates["refExists"] = ref_exists
     if ref_delete_triggered is not None:
         status_updates["refDeleteTriggered"] = ref_delete_triggered
+    if ref_delete_triggered_at is not None:
+        status_updates["refDeleteTriggeredAt"] = format_time(ref_delete_triggered_at)
+    if ref_deleted_at is not None:
+        status_updates["refDeletedAt"] = format_time(ref_deleted_at)
+    if ref_delete_duration_seconds is not None:
+        status_updates["refDeleteDurationSeconds"] = ref_delete_duration_seconds
+    if ref_delete_stuck is not None:
+        status_updates["refDeleteStuck"] = ref_delete_stuck
 
     LOG.info(f"Updating status for {name} in {namespace} with: {status_updates}")
     await update_schedule_status(namespace, name, status_updates)
@@ -120,3 +201,105 @@ async def schedule_check(body, namespace, **_):
 
     if not schedule.status.ref_delete_triggered:
         await check_for_delete(namespace, schedule)
+    elif not schedule.status.ref_deleted_at:
+        # Picks up deletes that were in flight when the operator restarted
+        await track_delete(namespace, schedule)
+        if not schedule.status.ref_delete_stuck:
+            await check_for_stuck_delete(namespace, schedule)
+
+
+def get_delete_watch_key(namespace: str, ref: schedule_crd.ScheduleRef):
+    # Use the same scope as the schedule watches
+    watch_namespace = None if scope.is_clusterwide() else namespace
+    return (ref.api_version, ref.kind, watch_namespace)
+
+
+async def track_delete(namespace: str, schedule: schedule_crd.Schedule):
+    """
+    Tracks the delete of the ref of the schedule until the ref is gone.
+
+    Deletes are tracked using one watch for each kind of ref, so the number of
+    connections does not grow with the number of deletes in flight.
+    """
+    key = get_delete_watch_key(namespace, schedule.spec.ref)
+    ref_key = (namespace, schedule.spec.ref.name)
+    DELETES_IN_FLIGHT.setdefault(key, {})[ref_key] = schedule
+    if key not in DELETE_WATCHES:
+        DELETE_WATCHES[key] = asyncio.create_task(watch_deletes(key))
+    elif key in EXISTING_REFS and ref_key not in EXISTING_REFS[key]:
+        # The running watch will never see an event for a ref that is already gone
+        await complete_delete(key, ref_key)
+
+
+async def complete_delete(key: tuple, ref_key: tuple):
+    schedule = DELETES_IN_FLIGHT[key].pop(ref_key, None)
+    if not schedule:
+        return
+    # A failure for one schedule must not stop the watch for the others,
+    # e.g. when the schedule was deleted along with its ref
+    try:
+        await record_delete_complete(schedule.metadata.namespace, schedule)
+    except Exception:
+        LOG.exception(
+            "error recording delete complete for %s in %s",
+            schedule.metadata.name,
+            schedule.metadata.namespace,
+        )
+
+
+@kopf.on.delete(registry.API_GROUP, "schedule", optional=True)
+async def schedule_deleted(body, namespace, **_):
+    """
+    Stops tracking the delete for a schedule that has been deleted.
+    """
+    schedule = schedule_crd.Schedule(**body)
+    key = get_delete_watch_key(namespace, schedule.spec.ref)
+    in_flight = DELETES_IN_FLIGHT.get(key, {})
+    ref_key = (namespace, schedule.spec.ref.name)
+    tracked = in_flight.get(ref_key)
+    if tracked and tracked.metadata.name == schedule.metadata.name:
+        del in_flight[ref_key]
+        # Stop the watch if it has nothing left to track
+        if not in_flight and key in DELETE_WATCHES:
+            DELETE_WATCHES[key].cancel()
+
+
+def get_ref_key(obj: dict):
+    return (obj["metadata"].get("namespace"), obj["metadata"]["name"])
+
+
+async def watch_deletes(key: tuple):
+    """
+    Watches the refs for the given key until all the deletes in flight are done.
+    """
+    in_flight = DELETES_IN_FLIGHT[key]
+    try:
+        while in_flight:
+            initial, events = await watch_references(*key)
+            existing = EXISTING_REFS[key] = {get_ref_key(obj) for obj in initial}
+            # Refs that are already gone were deleted before the watch started
+            for ref_key in [k for k in in_flight if k not in existing]:
+                await complete_delete(key, ref_key)
+            if not in_flight:
+                break
+            try:
+                async with events:
+                    async for event in k8s.watch_events(events):
+                        ref_key = get_ref_key(event["object"])
+                        if event["type"] == "DELETED":
+                            existing.discard(ref_key)
+                            await complete_delete(key, ref_key)
+                        else:
+                            existing.add(ref_key)
+                        if not in_flight:
+                            break
+            except k8s.WatchExpired:
+                LOG.info("Watch for deletes of %s expired - listing again.", key)
+    except Exception:
+        # Deletes still in flight are picked up again by the next schedule check
+        LOG.exception("error watching deletes for %s", key)
+    finally:
+        del DELETE_WATCHES[key]
+        EXISTING_REFS.pop(key, None)
+        if not in_flight:
+            DELETES_IN_FLIGHT.pop(key, None)
@@ -1,3 +1,10 @@
+import asyncio
+import json
+
+from easykube.kubernetes.client import iterators
+import httpx
+
+
 class AsyncIterList:
     def __init__(self, items):
         self.items = items
@@ -7,3 +14,64 @@ class AsyncIterList:
         self.kwargs = kwargs
         for item in self.items:
             yield item
+
+
+class AsyncWatchEvents:
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def __aiter__(self):
+        for event in self.events:
+            yield event
+
+
+class QueueWatchEvents:
+    """Watch events that are sent by the test while the watch is running."""
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    async def put(self, event):
+        await self.queue.put(event)
+        # Give the watch a chance to process the event
+        while not self.queue.empty():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def __aiter__(self):
+        while True:
+            yield await self.queue.get()
+
+
+def expired_watch_events():
+    """Returns real easykube watch events for a watch that has expired."""
+    error = {
+        "type": "ERROR",
+        "object": {
+            "kind": "Status",
+            "apiVersion": "v1",
+            "metadata": {},
+            "status": "Failure",
+            "message": "too old resource version: 1 (2)",
+            "reason": "Expired",
+            "code": 410,
+        },
+    }
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, text=json.dumps(error) + "\n")
+    )
+    client = httpx.AsyncClient(transport=transport, base_url="http://k8s")
+    return iterators.WatchEvents(client, "/api/v1/namespaces", {}, "1")
@@ -81,6 +81,23 @@ class TestModels(base.TestCase):
                   "refDeleteTriggered": {
                     "type": "boolean"
                   },
+                  "refDeleteTriggeredAt": {
+                    "format": "date-time",
+                    "nullable": true,
+                    "type": "string"
+                  },
+                  "refDeletedAt": {
+                    "format": "date-time",
+                    "nullable": true,
+                    "type": "string"
+                  },
+                  "refDeleteDurationSeconds": {
+                    "nullable": true,
+                    "type": "number"
+                  },
+                  "refDeleteStuck": {
+                    "type": "boolean"
+                  },
                   "updatedAt": {
                     "format": "date-time",
                     "nullable": true,
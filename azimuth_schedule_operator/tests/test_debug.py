@@ -0,0 +1,72 @@
+import asyncio
+import time
+import tracemalloc
+import unittest
+
+from aiohttp import test_utils
+from aiohttp import web
+
+from azimuth_schedule_operator import debug
+
+
+class TestDebug(unittest.IsolatedAsyncioTestCase):
+    def _request(self, path):
+        app = web.Application()
+        app[debug.CAPTURE_LOCK] = asyncio.Lock()
+        return test_utils.make_mocked_request("GET", path, app=app)
+
+    def test_get_float_param_invalid(self):
+        request = self._request("/debug/profile?seconds=abc")
+
+        self.assertRaises(
+            web.HTTPBadRequest, debug.get_float_param, request, "seconds", 10
+        )
+
+    def test_get_float_param_out_of_range(self):
+        request = self._request("/debug/profile?seconds=1000")
+
+        self.assertRaises(
+            web.HTTPBadRequest, debug.get_float_param, request, "seconds", 10
+        )
+
+    async def test_profile_handler(self):
+        def busy_callback():
+            time.sleep(0.1)
+
+        request = self._request("/debug/profile?seconds=0.2&interval=0.001")
+        # Block the loop while the profile is running so it is sampled
+        asyncio.get_running_loop().call_soon(busy_callback)
+
+        response = await debug.profile_handler(request)
+
+        lines = response.text.splitlines()
+        self.assertTrue(lines[0].startswith("# "))
+        self.assertIn("busy_callback", response.text)
+
+    async def test_tracemalloc_handler(self):
+        request = self._request("/debug/tracemalloc?seconds=0.01&limit=5")
+
+        response = await debug.tracemalloc_handler(request)
+
+        self.assertTrue(response.text.startswith("# top 5 allocation sites"))
+        self.assertNotIn(tracemalloc.__file__, response.text)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    async def test_tasks_handler(self):
+        request = self._request("/debug/tasks")
+
+        response = await debug.tasks_handler(request)
+
+        self.assertIn("test_tasks_handler", response.text)
+
+    async def test_slow_callbacks_handler(self):
+        loop = asyncio.get_running_loop()
+        debug_mode = loop.get_debug()
+        request = self._request("/debug/slow-callbacks?seconds=0.1&threshold=0.01")
+        loop.call_later(0.01, time.sleep, 0.02)
+
+        response = await debug.slow_callbacks_handler(request)
+
+        self.assertIn("callbacks slower than 0.01s", response.text)
+        self.assertIn("Executing", response.text)
+        self.assertEqual(debug_mode, loop.get_debug())
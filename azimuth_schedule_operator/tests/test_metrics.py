@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+
+from easykube.rest import util
+
+from azimuth_schedule_operator import metrics
+from azimuth_schedule_operator.models.v1alpha1 import schedule as schedule_crd
+from azimuth_schedule_operator.tests import async_utils
+from azimuth_schedule_operator.utils import scope
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+    @mock.patch.object(scope, "WATCH_LABEL_SELECTOR", "")
+    def test_list_params_clusterwide(self):
+        result = list(metrics.list_params(None))
+
+        self.assertEqual([{"all_namespaces": True}], result)
+
+    @mock.patch.object(scope, "WATCH_LABEL_SELECTOR", "")
+    def test_list_params_namespaces(self):
+        result = list(metrics.list_params(["ns1", "ns2"]))
+
+        self.assertEqual([{"namespace": "ns1"}, {"namespace": "ns2"}], result)
+
+    @mock.patch.object(scope, "WATCH_LABEL_SELECTOR", "tenant=a")
+    def test_list_params_label_selector(self):
+        self.assertEqual(
+            [{"labelSelector": "tenant=a", "all_namespaces": True}],
+            list(metrics.list_params(None)),
+        )
+        self.assertEqual(
+            [{"labelSelector": "tenant=a", "namespace": "ns1"}],
+            list(metrics.list_params(["ns1"])),
+        )
+
+    @mock.patch.object(scope, "WATCH_LABEL_SELECTOR", "tenant=a")
+    async def test_metrics_handler(self):
+        schedule = util.PropertyDict(schedule_crd.get_fake_dict())
+        mock_resource = mock.Mock()
+        mock_resource.list.side_effect = lambda **kwargs: async_utils.AsyncIterList(
+            [schedule]
+        ).list(**kwargs)
+        mock_api = mock.AsyncMock()
+        mock_api.resource.return_value = mock_resource
+        mock_client = mock.AsyncMock()
+        mock_client.api_preferred_version.return_value = mock_api
+
+        response = await metrics.metrics_handler(mock_client, ["ns1", "ns2"], None)
+
+        mock_client.api_preferred_version.assert_awaited_once_with(
+            "scheduling.azimuth.stackhpc.com"
+        )
+        mock_api.resource.assert_awaited_once_with("schedules")
+        self.assertEqual(
+            [
+                mock.call(labelSelector="tenant=a", namespace="ns1"),
+                mock.call(labelSelector="tenant=a", namespace="ns2"),
+            ],
+            mock_resource.list.call_args_list,
+        )
+        # The schedule is listed once for each namespace
+        body = response.body.decode()
+        self.assertEqual(2, body.count("azimuth_schedule_ref_found{"))
+
+    def test_render_histogram(self):
+        class TestHistogram(metrics.Histogram):
+            prefix = "test"
+            suffix = "duration_seconds"
+            description = "Test histogram"
+            buckets = (1, 2.5, 10)
+
+        histogram = TestHistogram()
+        for value in (0.5, 2, 2.5, 20):
+            histogram.observe(value)
+
+        content_type, content = metrics.render_openmetrics(histogram)
+
+        self.assertEqual(
+            "application/openmetrics-text; version=1.0.0; charset=utf-8", content_type
+        )
+        self.assertEqual(
+            "# HELP test_duration_seconds Test histogram\n"
+            "# TYPE test_duration_seconds histogram\n"
+            'test_duration_seconds_bucket{le="1.0"} 1\n'
+            'test_duration_seconds_bucket{le="2.5"} 3\n'
+            'test_duration_seconds_bucket{le="10.0"} 3\n'
+            'test_duration_seconds_bucket{le="+Inf"} 4\n'
+            "test_duration_seconds_count 4\n"
+            "test_duration_seconds_sum 25.0\n"
+            "# EOF\n",
+            content.decode(),
+        )
+
+    def test_render_gauge(self):
+        metric = metrics.ScheduleRefFound()
+        found = util.PropertyDict(schedule_crd.get_fake_dict())
+        found["status"] = {"refExists": True}
+        metric.add_obj(found)
+        metric.add_obj(util.PropertyDict(schedule_crd.get_fake_dict()))
+
+        _, content = metrics.render_openmetrics(metric)
+
+        labels = (
+            'ref_kind="Pod",ref_name="test1",'
+            'schedule_name="test1",schedule_namespace="ns1"'
+        )
+        self.assertEqual(
+            "# HELP azimuth_schedule_ref_found Indicates whether the ref has been "
+            "found\n"
+            "# TYPE azimuth_schedule_ref_found gauge\n"
+            f"azimuth_schedule_ref_found{{{labels}}} 1\n"
+            f"azimuth_schedule_ref_found{{{labels}}} 0\n"
+            "# EOF\n",
+            content.decode(),
+        )
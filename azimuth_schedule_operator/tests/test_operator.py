@@ -1,9 +1,11 @@
+import asyncio
 import datetime
 import unittest
 from unittest import mock
 
 from azimuth_schedule_operator.models.v1alpha1 import schedule as schedule_crd
 from azimuth_schedule_operator import operator
+from azimuth_schedule_operator.tests import async_utils
 
 
 class TestOperator(unittest.IsolatedAsyncioTestCase):
@@ -70,24 +72,37 @@ class TestOperator(unittest.IsolatedAsyncioTestCase):
         )
 
     @mock.patch.object(operator, "update_schedule")
+    @mock.patch.object(operator, "track_delete")
     @mock.patch.object(operator, "check_for_delete")
     @mock.patch.object(operator, "get_reference")
     async def test_schedule_check_skip(
-        self, mock_get_reference, mock_check_for_delete, mock_update_schedule
+        self,
+        mock_get_reference,
+        mock_check_for_delete,
+        mock_track_delete,
+        mock_update_schedule,
     ):
         body = schedule_crd.get_fake_dict()
-        body["status"] = {"refExists": True, "refDeleteTriggered": True}
+        body["status"] = {
+            "refExists": True,
+            "refDeleteTriggered": True,
+            "refDeletedAt": "2024-01-01T00:00:00Z",
+        }
         namespace = "ns1"
 
         await operator.schedule_check(body, namespace)
 
         mock_get_reference.assert_not_called()
         mock_check_for_delete.assert_not_called()
+        mock_track_delete.assert_not_called()
         mock_update_schedule.assert_not_called()
 
+    @mock.patch.object(operator, "track_delete")
     @mock.patch.object(operator, "update_schedule")
     @mock.patch.object(operator, "delete_reference")
-    async def test_check_for_delete(self, mock_delete_reference, mock_update_schedule):
+    async def test_check_for_delete(
+        self, mock_delete_reference, mock_update_schedule, mock_track_delete
+    ):
         namespace = "ns1"
         schedule = schedule_crd.get_fake()
 
@@ -95,8 +110,13 @@ class TestOperator(unittest.IsolatedAsyncioTestCase):
 
         mock_delete_reference.assert_awaited_once_with(namespace, schedule.spec.ref)
         mock_update_schedule.assert_awaited_once_with(
-            namespace, schedule.metadata.name, ref_delete_triggered=True
+            namespace,
+            schedule.metadata.name,
+            ref_delete_triggered=True,
+            ref_delete_triggered_at=mock.ANY,
         )
+        mock_track_delete.assert_awaited_once_with(namespace, schedule)
+        self.assertIsNotNone(schedule.status.ref_delete_triggered_at)
 
     @mock.patch.object(operator, "update_schedule")
     @mock.patch.object(operator, "delete_reference")
@@ -113,6 +133,386 @@ class TestOperator(unittest.IsolatedAsyncioTestCase):
         mock_delete_reference.assert_not_called()
         mock_update_schedule.assert_not_called()
 
+    @mock.patch.object(operator, "update_schedule")
+    @mock.patch.object(operator, "track_delete")
+    @mock.patch.object(operator, "check_for_stuck_delete")
+    @mock.patch.object(operator, "check_for_delete")
+    @mock.patch.object(operator, "get_reference")
+    async def test_schedule_check_delete_in_flight(
+        self,
+        mock_get_reference,
+        mock_check_for_delete,
+        mock_check_for_stuck_delete,
+        mock_track_delete,
+        mock_update_schedule,
+    ):
+        body = schedule_crd.get_fake_dict()
+        body["status"] = {"refExists": True, "refDeleteTriggered": True}
+        fake = schedule_crd.Schedule(**body)
+        namespace = "ns1"
+
+        await operator.schedule_check(body, namespace)
+
+        mock_get_reference.assert_not_called()
+        mock_check_for_delete.assert_not_called()
+        mock_track_delete.assert_awaited_once_with(namespace, fake)
+        mock_check_for_stuck_delete.assert_awaited_once_with(namespace, fake)
+        mock_update_schedule.assert_not_called()
+
+    @mock.patch.object(operator, "update_schedule")
+    async def test_check_for_stuck_delete(self, mock_update_schedule):
+        namespace = "ns1"
+        schedule = schedule_crd.get_fake()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        schedule.status.ref_delete_triggered = True
+        schedule.status.ref_delete_triggered_at = now - datetime.timedelta(
+            seconds=operator.DELETE_TIMEOUT_SECONDS
+        )
+
+        await operator.check_for_stuck_delete(namespace, schedule)
+
+        mock_update_schedule.assert_awaited_once_with(
+            namespace, schedule.metadata.name, ref_delete_stuck=True
+        )
+
+    @mock.patch.object(operator, "update_schedule")
+    async def test_check_for_stuck_delete_skip(self, mock_update_schedule):
+        namespace = "ns1"
+        schedule = schedule_crd.get_fake()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        schedule.status.ref_delete_triggered = True
+        schedule.status.ref_delete_triggered_at = now
+
+        await operator.check_for_stuck_delete(namespace, schedule)
+
+        mock_update_schedule.assert_not_called()
+
+    @mock.patch.object(operator.metrics, "DELETE_DURATION")
+    @mock.patch.object(operator, "update_schedule")
+    async def test_record_delete_complete(self, mock_update_schedule, mock_histogram):
+        namespace = "ns1"
+        schedule = schedule_crd.get_fake()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        schedule.status.ref_delete_triggered_at = now - datetime.timedelta(seconds=300)
+
+        await operator.record_delete_complete(namespace, schedule)
+
+        mock_update_schedule.assert_awaited_once_with(
+            namespace,
+            schedule.metadata.name,
+            ref_deleted_at=mock.ANY,
+            ref_delete_duration_seconds=mock.ANY,
+            ref_delete_stuck=False,
+        )
+        duration = mock_update_schedule.call_args.kwargs["ref_delete_duration_seconds"]
+        self.assertGreaterEqual(duration, 300)
+        mock_histogram.observe.assert_called_once_with(duration)
+
+    @mock.patch.object(operator.metrics, "DELETE_DURATION")
+    @mock.patch.object(operator, "update_schedule")
+    async def test_record_delete_complete_no_start(
+        self, mock_update_schedule, mock_histogram
+    ):
+        namespace = "ns1"
+        schedule = schedule_crd.get_fake()
+
+        await operator.record_delete_complete(namespace, schedule)
+
+        mock_update_schedule.assert_awaited_once_with(
+            namespace,
+            schedule.metadata.name,
+            ref_deleted_at=mock.ANY,
+            ref_delete_duration_seconds=None,
+            ref_delete_stuck=False,
+        )
+        mock_histogram.observe.assert_not_called()
+
+    def _fake_schedule(self, name):
+        body = schedule_crd.get_fake_dict()
+        body["metadata"]["name"] = name
+        body["spec"]["ref"]["name"] = name
+        return schedule_crd.Schedule(**body)
+
+    def _watch_event(self, event_type, name, namespace="ns1"):
+        return {
+            "type": event_type,
+            "object": {"metadata": {"name": name, "namespace": namespace}},
+        }
+
+    @mock.patch.object(operator.scope, "is_clusterwide", return_value=True)
+    @mock.patch.object(operator, "watch_deletes")
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_track_delete(self, mock_watch_deletes, mock_clusterwide):
+        schedule1 = self._fake_schedule("test1")
+        schedule2 = self._fake_schedule("test2")
+
+        await operator.track_delete("ns1", schedule1)
+        await operator.track_delete("ns1", schedule2)
+        key = ("v1", "Pod", None)
+        await operator.DELETE_WATCHES[key]
+
+        # Both deletes share a single watch
+        mock_watch_deletes.assert_called_once_with(key)
+        self.assertEqual(
+            {("ns1", "test1"): schedule1, ("ns1", "test2"): schedule2},
+            operator.DELETES_IN_FLIGHT[key],
+        )
+
+    @mock.patch.object(operator.scope, "is_clusterwide", return_value=False)
+    @mock.patch.object(operator, "watch_deletes")
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_track_delete_namespaced(self, mock_watch_deletes, mock_clusterwide):
+        schedule = self._fake_schedule("test1")
+
+        await operator.track_delete("ns1", schedule)
+        await operator.DELETE_WATCHES[("v1", "Pod", "ns1")]
+
+        mock_watch_deletes.assert_called_once_with(("v1", "Pod", "ns1"))
+
+    @mock.patch.object(operator.scope, "is_clusterwide", return_value=True)
+    @mock.patch.object(operator, "record_delete_complete")
+    @mock.patch.object(operator, "watch_references")
+    @mock.patch.dict(operator.EXISTING_REFS, clear=True)
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_track_delete_running_watch(
+        self, mock_watch_references, mock_record, mock_clusterwide
+    ):
+        key = ("v1", "Pod", None)
+        schedule1 = self._fake_schedule("test1")
+        schedule2 = self._fake_schedule("test2")
+        schedule3 = self._fake_schedule("test3")
+        events = async_utils.QueueWatchEvents()
+        mock_watch_references.return_value = (
+            [
+                {"metadata": {"name": "test1", "namespace": "ns1"}},
+                {"metadata": {"name": "test3", "namespace": "ns1"}},
+            ],
+            events,
+        )
+        await operator.track_delete("ns1", schedule1)
+        watch = operator.DELETE_WATCHES[key]
+        # Let the watch make its initial list
+        await asyncio.sleep(0)
+
+        # test2 was deleted before it was registered, test3 still exists
+        await operator.track_delete("ns1", schedule2)
+        await operator.track_delete("ns1", schedule3)
+
+        mock_record.assert_awaited_once_with("ns1", schedule2)
+        self.assertFalse(watch.done())
+
+        await events.put(self._watch_event("DELETED", "test3"))
+        await events.put(self._watch_event("DELETED", "test1"))
+        await watch
+
+        mock_record.assert_has_awaits(
+            [
+                mock.call("ns1", schedule2),
+                mock.call("ns1", schedule3),
+                mock.call("ns1", schedule1),
+            ]
+        )
+        mock_watch_references.assert_awaited_once_with("v1", "Pod", None)
+        self.assertEqual({}, operator.DELETE_WATCHES)
+        self.assertEqual({}, operator.DELETES_IN_FLIGHT)
+        self.assertEqual({}, operator.EXISTING_REFS)
+
+    @mock.patch.object(operator.scope, "is_clusterwide", return_value=True)
+    @mock.patch.object(operator, "record_delete_complete")
+    @mock.patch.object(operator, "watch_references")
+    @mock.patch.dict(operator.EXISTING_REFS, clear=True)
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_track_delete_deleted_before_registered(
+        self, mock_watch_references, mock_record, mock_clusterwide
+    ):
+        key = ("v1", "Pod", None)
+        schedule1 = self._fake_schedule("test1")
+        schedule2 = self._fake_schedule("test2")
+        events = async_utils.QueueWatchEvents()
+        mock_watch_references.return_value = (
+            [
+                {"metadata": {"name": "test1", "namespace": "ns1"}},
+                {"metadata": {"name": "test2", "namespace": "ns1"}},
+            ],
+            events,
+        )
+        await operator.track_delete("ns1", schedule1)
+        watch = operator.DELETE_WATCHES[key]
+        await asyncio.sleep(0)
+        # test2 goes while its schedule status is being updated
+        await events.put(self._watch_event("DELETED", "test2"))
+
+        await operator.track_delete("ns1", schedule2)
+
+        mock_record.assert_awaited_once_with("ns1", schedule2)
+        await events.put(self._watch_event("DELETED", "test1"))
+        await watch
+        self.assertEqual(2, mock_record.await_count)
+
+    @mock.patch.object(operator, "record_delete_complete")
+    @mock.patch.object(operator, "watch_references")
+    @mock.patch.dict(operator.EXISTING_REFS, clear=True)
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_watch_deletes_record_error(self, mock_watch_references, mock_record):
+        key = ("v1", "Pod", None)
+        schedule1 = self._fake_schedule("test1")
+        schedule2 = self._fake_schedule("test2")
+        operator.DELETES_IN_FLIGHT[key] = {
+            ("ns1", "test1"): schedule1,
+            ("ns1", "test2"): schedule2,
+        }
+        operator.DELETE_WATCHES[key] = mock.Mock()
+        mock_record.side_effect = [Exception("schedule not found"), None]
+        mock_watch_references.return_value = (
+            [
+                {"metadata": {"name": "test1", "namespace": "ns1"}},
+                {"metadata": {"name": "test2", "namespace": "ns1"}},
+            ],
+            async_utils.AsyncWatchEvents(
+                [
+                    self._watch_event("DELETED", "test1"),
+                    self._watch_event("DELETED", "test2"),
+                ]
+            ),
+        )
+
+        await operator.watch_deletes(key)
+
+        # The watch carries on for test2 after failing to record test1
+        mock_record.assert_has_awaits(
+            [mock.call("ns1", schedule1), mock.call("ns1", schedule2)]
+        )
+        self.assertEqual({}, operator.DELETES_IN_FLIGHT)
+
+    @mock.patch.object(operator.scope, "is_clusterwide", return_value=True)
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_schedule_deleted(self, mock_clusterwide):
+        key = ("v1", "Pod", None)
+        schedule1 = self._fake_schedule("test1")
+        schedule2 = self._fake_schedule("test2")
+        operator.DELETES_IN_FLIGHT[key] = {
+            ("ns1", "test1"): schedule1,
+            ("ns1", "test2"): schedule2,
+        }
+        mock_watch = mock.Mock()
+        operator.DELETE_WATCHES[key] = mock_watch
+
+        await operator.schedule_deleted(schedule1.model_dump(by_alias=True), "ns1")
+
+        self.assertEqual({("ns1", "test2"): schedule2}, operator.DELETES_IN_FLIGHT[key])
+        mock_watch.cancel.assert_not_called()
+
+        await operator.schedule_deleted(schedule2.model_dump(by_alias=True), "ns1")
+
+        self.assertEqual({}, operator.DELETES_IN_FLIGHT[key])
+        mock_watch.cancel.assert_called_once_with()
+
+    @mock.patch.object(operator.scope, "is_clusterwide", return_value=True)
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_schedule_deleted_not_tracked(self, mock_clusterwide):
+        schedule = self._fake_schedule("test1")
+
+        await operator.schedule_deleted(schedule.model_dump(by_alias=True), "ns1")
+
+        self.assertEqual({}, operator.DELETES_IN_FLIGHT)
+
+    @mock.patch.object(operator, "record_delete_complete")
+    @mock.patch.object(operator, "watch_references")
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_watch_deletes(self, mock_watch_references, mock_record):
+        key = ("v1", "Pod", None)
+        schedule1 = self._fake_schedule("test1")
+        schedule2 = self._fake_schedule("test2")
+        schedule3 = self._fake_schedule("test3")
+        operator.DELETES_IN_FLIGHT[key] = {
+            ("ns1", "test1"): schedule1,
+            ("ns1", "test2"): schedule2,
+            ("ns1", "test3"): schedule3,
+        }
+        operator.DELETE_WATCHES[key] = mock.Mock()
+        events = async_utils.AsyncWatchEvents(
+            [
+                self._watch_event("MODIFIED", "test2"),
+                self._watch_event("DELETED", "other"),
+                self._watch_event("DELETED", "test2", namespace="ns2"),
+                self._watch_event("DELETED", "test2"),
+                self._watch_event("DELETED", "test3"),
+                self._watch_event("DELETED", "never"),
+            ]
+        )
+        mock_watch_references.return_value = (
+            [
+                {"metadata": {"name": "test2", "namespace": "ns1"}},
+                {"metadata": {"name": "test3", "namespace": "ns1"}},
+            ],
+            events,
+        )
+
+        await operator.watch_deletes(key)
+
+        mock_watch_references.assert_awaited_once_with("v1", "Pod", None)
+        # test1 was gone before the watch started
+        mock_record.assert_has_awaits(
+            [
+                mock.call("ns1", schedule1),
+                mock.call("ns1", schedule2),
+                mock.call("ns1", schedule3),
+            ]
+        )
+        self.assertEqual(3, mock_record.await_count)
+        self.assertTrue(events.closed)
+        self.assertEqual({}, operator.DELETE_WATCHES)
+        self.assertEqual({}, operator.DELETES_IN_FLIGHT)
+
+    @mock.patch.object(operator, "record_delete_complete")
+    @mock.patch.object(operator, "watch_references")
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_watch_deletes_expired(self, mock_watch_references, mock_record):
+        key = ("v1", "Pod", "ns1")
+        schedule = self._fake_schedule("test1")
+        operator.DELETES_IN_FLIGHT[key] = {("ns1", "test1"): schedule}
+        operator.DELETE_WATCHES[key] = mock.Mock()
+        mock_watch_references.side_effect = [
+            (
+                [{"metadata": {"name": "test1", "namespace": "ns1"}}],
+                async_utils.expired_watch_events(),
+            ),
+            ([], async_utils.AsyncWatchEvents([])),
+        ]
+
+        await operator.watch_deletes(key)
+
+        self.assertEqual(2, mock_watch_references.await_count)
+        mock_record.assert_awaited_once_with("ns1", schedule)
+        self.assertEqual({}, operator.DELETES_IN_FLIGHT)
+
+    @mock.patch.object(operator, "record_delete_complete")
+    @mock.patch.object(operator, "watch_references")
+    @mock.patch.dict(operator.DELETE_WATCHES, clear=True)
+    @mock.patch.dict(operator.DELETES_IN_FLIGHT, clear=True)
+    async def test_watch_deletes_error(self, mock_watch_references, mock_record):
+        key = ("v1", "Pod", None)
+        schedule = self._fake_schedule("test1")
+        operator.DELETES_IN_FLIGHT[key] = {("ns1", "test1"): schedule}
+        operator.DELETE_WATCHES[key] = mock.Mock()
+        mock_watch_references.side_effect = Exception("boom")
+
+        await operator.watch_deletes(key)
+
+        mock_record.assert_not_called()
+        # The delete stays in flight for the next schedule check to pick up
+        self.assertEqual({}, operator.DELETE_WATCHES)
+        self.assertEqual({("ns1", "test1"): schedule}, operator.DELETES_IN_FLIGHT[key])
+
     @mock.patch.object(operator, "update_schedule_status")
     async def test_update_schedule(self, mock_update_schedule_status):
         name = "schedule1"
@@ -158,6 +558,55 @@ class TestOperator(unittest.IsolatedAsyncioTestCase):
         mock_api.resource.assert_awaited_once_with("Pod")
         mock_resource.delete.assert_awaited_once_with("pod1", namespace="ns1")
 
+    @mock.patch.object(operator, "update_schedule_status")
+    async def test_update_schedule_delete_complete(self, mock_update_schedule_status):
+        deleted_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+        await operator.update_schedule(
+            "ns1",
+            "schedule1",
+            ref_deleted_at=deleted_at,
+            ref_delete_duration_seconds=12.5,
+            ref_delete_stuck=False,
+        )
+
+        mock_update_schedule_status.assert_awaited_once_with(
+            "ns1",
+            "schedule1",
+            {
+                "updatedAt": mock.ANY,
+                "refDeletedAt": "2024-01-01T00:00:00Z",
+                "refDeleteDurationSeconds": 12.5,
+                "refDeleteStuck": False,
+            },
+        )
+
+    @mock.patch.object(operator, "K8S_CLIENT", new_callable=mock.Mock)
+    async def test_watch_references(self, mock_client):
+        mock_resource = mock.AsyncMock()
+        mock_api = mock.AsyncMock()
+        mock_api.resource.return_value = mock_resource
+        mock_client.api.return_value = mock_api
+        mock_resource.watch_list.return_value = ("initial", "events")
+
+        result = await operator.watch_references("v1", "Pod")
+
+        self.assertEqual(("initial", "events"), result)
+        mock_client.api.assert_called_once_with("v1")
+        mock_api.resource.assert_awaited_once_with("Pod")
+        mock_resource.watch_list.assert_awaited_once_with(all_namespaces=True)
+
+    @mock.patch.object(operator, "K8S_CLIENT", new_callable=mock.Mock)
+    async def test_watch_references_namespaced(self, mock_client):
+        mock_resource = mock.AsyncMock()
+        mock_api = mock.AsyncMock()
+        mock_api.resource.return_value = mock_resource
+        mock_client.api.return_value = mock_api
+
+        await operator.watch_references("v1", "Pod", "ns1")
+
+        mock_resource.watch_list.assert_awaited_once_with(namespace="ns1")
+
     @mock.patch.object(operator, "K8S_CLIENT", new_callable=mock.Mock)
     async def test_update_schedule_status(self, mock_client):
         mock_resource = mock.AsyncMock()
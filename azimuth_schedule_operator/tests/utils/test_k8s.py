@@ -0,0 +1,30 @@
+import unittest
+
+from azimuth_schedule_operator.tests import async_utils
+from azimuth_schedule_operator.utils import k8s
+
+
+class TestK8s(unittest.IsolatedAsyncioTestCase):
+    async def test_watch_events(self):
+        events = async_utils.AsyncWatchEvents([{"type": "ADDED"}, {"type": "DELETED"}])
+
+        result = [event async for event in k8s.watch_events(events)]
+
+        self.assertEqual([{"type": "ADDED"}, {"type": "DELETED"}], result)
+
+    async def test_watch_events_expired(self):
+        events = async_utils.expired_watch_events()
+
+        with self.assertRaises(k8s.WatchExpired):
+            async with events:
+                async for _ in k8s.watch_events(events):
+                    pass
+
+    async def test_watch_events_error_event(self):
+        events = async_utils.AsyncWatchEvents(
+            [{"type": "ERROR", "object": {"message": "too old resource version"}}]
+        )
+
+        with self.assertRaisesRegex(k8s.WatchExpired, "too old resource version"):
+            async for _ in k8s.watch_events(events):
+                pass
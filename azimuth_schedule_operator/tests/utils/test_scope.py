@@ -0,0 +1,165 @@
+import unittest
+from unittest import mock
+
+from kopf._cogs.structs import references
+
+from azimuth_schedule_operator.tests import async_utils
+from azimuth_schedule_operator.utils import scope
+
+
+class TestScope(unittest.IsolatedAsyncioTestCase):
+    def _mock_client(self, namespaces):
+        mock_client = mock.Mock()
+        mock_api = mock.AsyncMock()
+        mock_api.resource.return_value = async_utils.AsyncIterList(
+            [{"metadata": {"name": ns}} for ns in namespaces]
+        )
+        mock_client.api.return_value = mock_api
+        return mock_client
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", [])
+    async def test_get_watch_namespaces_clusterwide(self):
+        mock_client = self._mock_client([])
+
+        result = await scope.get_watch_namespaces(mock_client)
+
+        self.assertIsNone(result)
+        mock_client.api.assert_not_called()
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", ["ns2", "ns1"])
+    async def test_get_watch_namespaces_list(self):
+        mock_client = self._mock_client([])
+
+        result = await scope.get_watch_namespaces(mock_client)
+
+        self.assertEqual(["ns1", "ns2"], result)
+        mock_client.api.assert_not_called()
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "tenant=a")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", [])
+    async def test_get_watch_namespaces_selector(self):
+        mock_client = self._mock_client(["ns1", "ns3"])
+
+        result = await scope.get_watch_namespaces(mock_client)
+
+        self.assertEqual(["ns1", "ns3"], result)
+        mock_client.api.assert_called_once_with("v1")
+        mock_resource = mock_client.api.return_value.resource.return_value
+        self.assertEqual({"labelSelector": "tenant=a"}, mock_resource.kwargs)
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "tenant=a")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", ["ns1", "ns2"])
+    async def test_get_watch_namespaces_list_and_selector(self):
+        mock_client = self._mock_client(["ns1", "ns3"])
+
+        result = await scope.get_watch_namespaces(mock_client)
+
+        self.assertEqual(["ns1"], result)
+
+    def _mock_watch_client(self, initial, events):
+        mock_client = mock.Mock()
+        mock_api = mock.AsyncMock()
+        mock_resource = mock.AsyncMock()
+        mock_resource.watch_list.return_value = (
+            [{"metadata": {"name": ns}} for ns in initial],
+            async_utils.AsyncWatchEvents(
+                [
+                    {"type": event_type, "object": {"metadata": {"name": ns}}}
+                    for event_type, ns in events
+                ]
+            ),
+        )
+        mock_api.resource.return_value = mock_resource
+        mock_client.api.return_value = mock_api
+        return mock_client
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "tenant=a")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", [])
+    async def test_wait_for_namespaces_change_added(self):
+        mock_client = self._mock_watch_client(
+            ["ns1"], [("MODIFIED", "ns1"), ("ADDED", "ns2")]
+        )
+
+        result = await scope.wait_for_namespaces_change(mock_client, ["ns1"])
+
+        self.assertEqual(["ns1", "ns2"], result)
+        mock_resource = mock_client.api.return_value.resource.return_value
+        mock_resource.watch_list.assert_awaited_once_with(labelSelector="tenant=a")
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "tenant=a")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", [])
+    async def test_wait_for_namespaces_change_deleted(self):
+        mock_client = self._mock_watch_client(["ns1", "ns2"], [("DELETED", "ns2")])
+
+        result = await scope.wait_for_namespaces_change(mock_client, ["ns1", "ns2"])
+
+        self.assertEqual(["ns1"], result)
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "tenant=a")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", [])
+    async def test_wait_for_namespaces_change_initial(self):
+        mock_client = self._mock_watch_client(["ns1"], [])
+
+        result = await scope.wait_for_namespaces_change(mock_client, [])
+
+        self.assertEqual(["ns1"], result)
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "tenant=a")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", ["ns1"])
+    async def test_wait_for_namespaces_change_ignores_unlisted(self):
+        mock_client = self._mock_watch_client(
+            ["ns1"], [("ADDED", "ns3"), ("DELETED", "ns1")]
+        )
+
+        result = await scope.wait_for_namespaces_change(mock_client, ["ns1"])
+
+        self.assertEqual([], result)
+
+    @mock.patch.object(scope, "WATCH_NAMESPACE_SELECTOR", "tenant=a")
+    @mock.patch.object(scope, "WATCH_NAMESPACES", [])
+    async def test_wait_for_namespaces_change_expired(self):
+        mock_client = self._mock_watch_client([], [])
+        mock_resource = mock_client.api.return_value.resource.return_value
+        mock_resource.watch_list.side_effect = [
+            ([{"metadata": {"name": "ns1"}}], async_utils.expired_watch_events()),
+            (
+                [{"metadata": {"name": "ns1"}}, {"metadata": {"name": "ns2"}}],
+                async_utils.AsyncWatchEvents([]),
+            ),
+        ]
+
+        result = await scope.wait_for_namespaces_change(mock_client, ["ns1"])
+
+        self.assertEqual(["ns1", "ns2"], result)
+        self.assertEqual(2, mock_resource.watch_list.await_count)
+
+    @mock.patch.object(references.Resource, "get_url", references.Resource.get_url)
+    def test_apply_label_selector(self):
+        schedules = references.Resource(
+            "scheduling.azimuth.stackhpc.com", "v1alpha1", "schedules", namespaced=True
+        )
+        pods = references.Resource("", "v1", "pods", namespaced=True)
+
+        scope.apply_label_selector("tenant=a")
+
+        self.assertEqual(
+            "/apis/scheduling.azimuth.stackhpc.com/v1alpha1/namespaces/ns1/schedules"
+            "?watch=true&labelSelector=tenant%3Da",
+            schedules.get_url(namespace="ns1", params={"watch": "true"}),
+        )
+        self.assertEqual(
+            "/apis/scheduling.azimuth.stackhpc.com/v1alpha1/namespaces/ns1/schedules"
+            "/test1/status",
+            schedules.get_url(namespace="ns1", name="test1", subresource="status"),
+        )
+        self.assertEqual("/api/v1/pods", pods.get_url())
+
+    @mock.patch.object(references.Resource, "get_url", references.Resource.get_url)
+    def test_apply_label_selector_noop(self):
+        original = references.Resource.get_url
+
+        scope.apply_label_selector("")
+
+        self.assertIs(original, references.Resource.get_url)
@@ -13,3 +13,30 @@ def get_k8s_client():
 async def get_pod_resource(client):
     # TODO(johngarbutt): unclear how to mock this directly?
     return await client.api("v1").resource("pods")
+
+
+class WatchExpired(Exception):
+    """
+    Raised when a watch has expired and must be restarted from a fresh list.
+    """
+
+
+async def watch_events(events):
+    """
+    Yields the events from an easykube watch, raising WatchExpired if it expires.
+
+    An expired watch is reported as an ERROR event in the stream, not as an HTTP
+    error. easykube fails to process these events with a KeyError because they
+    have no resource version.
+    """
+    iterator = events.__aiter__()
+    while True:
+        try:
+            event = await iterator.__anext__()
+        except StopAsyncIteration:
+            return
+        except KeyError as exc:
+            raise WatchExpired("watch returned an error event") from exc
+        if event["type"] == "ERROR":
+            raise WatchExpired(event["object"].get("message", "watch error"))
+        yield event
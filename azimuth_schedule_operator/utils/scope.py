@@ -0,0 +1,113 @@
+import logging
+import os
+
+from kopf._cogs.structs import references
+
+from azimuth_schedule_operator.models import registry
+from azimuth_schedule_operator.utils import k8s
+
+LOG = logging.getLogger(__name__)
+
+# Comma-separated list of namespaces to watch for schedules
+WATCH_NAMESPACES = [
+    ns.strip()
+    for ns in os.environ.get("AZIMUTH_SCHEDULE_WATCH_NAMESPACES", "").split(",")
+    if ns.strip()
+]
+# Label selector for the namespaces to watch for schedules
+WATCH_NAMESPACE_SELECTOR = os.environ.get(
+    "AZIMUTH_SCHEDULE_WATCH_NAMESPACE_SELECTOR", ""
+).strip()
+# Label selector for the schedules to watch
+WATCH_LABEL_SELECTOR = os.environ.get(
+    "AZIMUTH_SCHEDULE_WATCH_LABEL_SELECTOR", ""
+).strip()
+
+SCHEDULES_PLURAL = "schedules"
+
+
+def is_clusterwide():
+    return not WATCH_NAMESPACES and not WATCH_NAMESPACE_SELECTOR
+
+
+def select_namespaces(selected):
+    """
+    Returns the namespaces to watch, given the namespaces matching the selector.
+    """
+    # When both are given, only watch the listed namespaces that also match
+    if WATCH_NAMESPACES:
+        return sorted(ns for ns in set(WATCH_NAMESPACES) if ns in selected)
+    else:
+        return sorted(set(selected))
+
+
+async def get_watch_namespaces(client):
+    """
+    Returns the namespaces to watch, or None if all namespaces should be watched.
+    """
+    if is_clusterwide():
+        return None
+    if not WATCH_NAMESPACE_SELECTOR:
+        return sorted(set(WATCH_NAMESPACES))
+    ekresource = await client.api("v1").resource("namespaces")
+    return select_namespaces(
+        [
+            ns["metadata"]["name"]
+            async for ns in ekresource.list(labelSelector=WATCH_NAMESPACE_SELECTOR)
+        ]
+    )
+
+
+async def wait_for_namespaces_change(client, namespaces):
+    """
+    Watches the namespaces matching the namespace label selector until the
+    namespaces to watch differ from the given namespaces.
+
+    Returns the new namespaces to watch.
+    """
+    ekresource = await client.api("v1").resource("namespaces")
+    while True:
+        initial, events = await ekresource.watch_list(
+            labelSelector=WATCH_NAMESPACE_SELECTOR
+        )
+        selected = {ns["metadata"]["name"] for ns in initial}
+        if select_namespaces(selected) != namespaces:
+            return select_namespaces(selected)
+        try:
+            async with events:
+                async for event in k8s.watch_events(events):
+                    # Namespaces that stop matching the selector are sent as deleted
+                    name = event["object"]["metadata"]["name"]
+                    if event["type"] == "DELETED":
+                        selected.discard(name)
+                    else:
+                        selected.add(name)
+                    if select_namespaces(selected) != namespaces:
+                        return select_namespaces(selected)
+        except k8s.WatchExpired:
+            LOG.info("Namespace watch expired - listing namespaces again.")
+
+
+def apply_label_selector(label_selector=WATCH_LABEL_SELECTOR):
+    """
+    Makes kopf list and watch schedules using the given label selector.
+
+    kopf has no option for server-side label filtering, so we add the selector
+    to the collection URLs that kopf builds for schedules. Calls for individual
+    schedules, e.g. status patches, are left unchanged.
+    """
+    if not label_selector:
+        return
+    get_url = references.Resource.get_url
+
+    def get_url_with_selector(self, *, name=None, subresource=None, params=None, **kw):
+        if (
+            self.group == registry.API_GROUP
+            and self.plural == SCHEDULES_PLURAL
+            and name is None
+        ):
+            params = dict(params or {}, labelSelector=label_selector)
+        return get_url(self, name=name, subresource=subresource, params=params, **kw)
+
+    references.Resource.get_url = get_url_with_selector
+    LOG.info("Watching schedules matching label selector %s", label_selector)
@@ -51,3 +51,26 @@ app.kubernetes.io/version: {{ .Chart.AppVersion | quote }}
 {{- end }}
 {{ include "azimuth-schedule-operator.selectorLabels" . }}
 {{- end }}
+
+{{/*
+Rules allowing the operator to manage schedules and delete the managed resources.
+*/}}
+{{- define "azimuth-schedule-operator.scheduleRules" -}}
+# Required by azimuth-schedule
+- apiGroups: ["scheduling.azimuth.stackhpc.com"]
+  resources: ["*"]
+  verbs: ["*"]
+# Allow the managed resources to be deleted by the operator
+# The operator watches the managed resources to see when the deletes complete
+{{- range .Values.managedResources }}
+- apiGroups:
+    {{- list .apiGroup | toYaml | nindent 4 }}
+  resources:
+    {{- toYaml .resources | nindent 4 }}
+  verbs:
+    - get
+    - list
+    - watch
+    - delete
+{{- end }}
+{{- end }}